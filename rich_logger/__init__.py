@@ -1,14 +1,29 @@
 from .table_printer import RichTablePrinter
 
-try:
-    from .pl_logger import RichTableLogger
-except ImportError as e:
-    exception = e
-
-    class RichTableLogger:
-        def __init__(self, key=None, fields=None):
-            raise Exception(
-                "Could not import RichTableLogger, some packages might be missing: {}".format(
-                    exception.name
-                )
-            ) from exception
+__all__ = ["RichTablePrinter", "RichTableLogger"]
+
+
+def __getattr__(name):
+    # Importing pytorch_lightning is slow, so only do it when the logger is requested
+    if name != "RichTableLogger":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    try:
+        from .pl_logger import RichTableLogger
+    except ImportError as e:
+        exception = e
+
+        class RichTableLogger:
+            def __init__(self, key=None, fields=None):
+                raise Exception(
+                    "Could not import RichTableLogger, some packages might be missing: {}".format(
+                        exception.name
+                    )
+                ) from exception
+
+    globals()["RichTableLogger"] = RichTableLogger
+    return RichTableLogger
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
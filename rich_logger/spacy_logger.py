@@ -43,6 +43,9 @@ def rich_logger(
         score_cols = [
             col for col, value in score_weights.items() if value is not None
         ] + ["speed"]
+        loss_cols = [(pipe, f"loss_{pipe}") for pipe in logged_pipes]
+        # Scores are displayed as percentages, except for the speed
+        score_scales = [(col, 1.0 if col == "speed" else 100.0) for col in score_cols]
 
         fields = {"epoch": {}, "step": {}}
         for pipe in logged_pipes:
@@ -75,24 +78,20 @@ def rich_logger(
                     progress.update(1)
                 return
 
-            data = {
-                "epoch": info["epoch"],
-                "step": info["step"],
-            }
-
-            for pipe in logged_pipes:
-                data[f"loss_{pipe}"] = float(info["losses"][pipe])
+            losses = info["losses"]
+            other_scores = info["other_scores"]
+            data = {"epoch": info["epoch"], "step": info["step"]}
+            for pipe, col in loss_cols:
+                data[col] = float(losses[pipe])
 
-            for col in score_cols:
-                score = info["other_scores"].get(col, 0.0)
+            for col, scale in score_scales:
+                score = other_scores.get(col, 0.0)
                 try:
                     score = float(score)
                 except TypeError:
                     err = Errors.E916.format(name=col, score_type=type(score))
                     raise ValueError(err) from None
-                if col != "speed":
-                    score *= 100
-                data[col] = score
+                data[col] = score * scale
             data["duration"] = info["seconds"] - last_seconds
             last_seconds = info["seconds"]
 
@@ -1,32 +1,50 @@
+import bisect
 import os
 import re
+import threading
 import time
 import typing
-from collections import OrderedDict
+from dataclasses import dataclass, field
 from enum import Enum
 from numbers import Number
-from typing import Any, Dict, Iterable, Optional, Sequence, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+    Union,
+)
 
-from pydantic import BaseModel, Extra
 from rich import get_console, reconfigure
-from rich.console import RenderableType
+from rich.console import Console, ConsoleOptions, RenderableType
 from rich.control import Control
 from rich.jupyter import _render_segments
 from rich.live import Live
+from rich.measure import Measurement
 from rich.progress import (
     BarColumn,
     Progress,
     ProgressColumn,
     Task,
+    TaskID,
     TaskProgressColumn,
     TextColumn,
     TimeRemainingColumn,
 )
-from rich.table import Column, Table
+from rich.segment import Segment
+from rich.table import Column, Row, Table
 from rich.text import Text
 
 T = typing.TypeVar("T")
 
+# Matches group references like \1 in column names
+BACKREF_REGEX = re.compile(r"\\\d+")
+
 # If we're in a slurm job, force the console to act as in a standard terminal
 if "SLURM_JOBID" in os.environ:
     reconfigure(force_terminal=True)
@@ -56,39 +74,85 @@ class RichToHTML:
         exclude: Sequence[str],
         **kwargs: Any,
     ) -> Dict[str, str]:
+        mimetypes = [
+            mimetype
+            for mimetype in ("text/plain", "text/html")
+            if (not include or mimetype in include)
+            and (not exclude or mimetype not in exclude)
+        ]
+        if not mimetypes:
+            return {}
         console = get_console()
 
         # In the browser, we can scroll horizontally so we don't need a limit
         console_options = console.options
         console_options.max_width = 2**32 - 1
 
+        # Render the table once, and only convert it to the requested formats
         segments = list(console.render(self.renderable, console_options))
-        html = _render_segments(segments)
-        text = console._render_buffer(segments)
-        data = {"text/plain": text, "text/html": html}
-        if include:
-            data = {k: v for (k, v) in data.items() if k in include}
-        if exclude:
-            data = {k: v for (k, v) in data.items() if k not in exclude}
-        return data
+        return {
+            mimetype: (
+                _render_segments(segments)
+                if mimetype == "text/html"
+                else console._render_buffer(segments)
+            )
+            for mimetype in mimetypes
+        }
+
+
+class CachedRenderable:
+    """
+    Wraps a renderable and reuses its segments until it is invalidated, so that
+    an unchanged logger table is not rendered again at every progress refresh
+    """
+
+    def __init__(self, renderable: RenderableType):
+        self.renderable = renderable
+        self._key: Optional[Tuple[Console, ConsoleOptions]] = None
+        self._segments: Optional[typing.List[Segment]] = None
+
+    def invalidate(self):
+        self._segments = None
+
+    def __rich_console__(
+        self, console: Console, options: ConsoleOptions
+    ) -> typing.List[Segment]:
+        key = (console, options)
+        if self._segments is None or self._key != key:
+            self._segments = list(console.render(self.renderable, options))
+            self._key = (console, options.copy())
+        return self._segments
+
+    def __rich_measure__(self, console: Console, options: ConsoleOptions):
+        return Measurement.get(console, options, self.renderable)
 
 
 class FixedLive(Live):
     def refresh(self) -> None:
         """Update the display of the Live Render."""
         with self._lock:
+            # Files and dumb terminals (CI logs, redirected output) only display
+            # the final result: don't render the tables while the display runs
+            if (
+                self._started
+                and not self.console.is_jupyter
+                and not (self.console.is_terminal and not self.console.is_dumb_terminal)
+            ):
+                return
             self._live_render.set_renderable(self.renderable)
             if self.console.is_jupyter:  # pragma: no cover
-                try:
-                    from IPython.display import display
-                except ImportError:
-                    import warnings
-
-                    warnings.warn('install "ipywidgets" for Jupyter support')
-                else:
-                    if self.ipy_widget is None:
+                # The display handle is created once, only import IPython then
+                if self.ipy_widget is None:
+                    try:
+                        from IPython.display import display
+                    except ImportError:
+                        import warnings
+
+                        warnings.warn('install "ipywidgets" for Jupyter support')
+                    else:
                         self.ipy_widget = display(None, display_id=True)
 
+                if self.ipy_widget is not None:
                     self.ipy_widget.update(
                         RichToHTML(
                             renderable=self._live_render.renderable,
@@ -111,51 +175,118 @@ class Goal(str, Enum):
     higher_is_better = "higher_is_better"
 
 
-class Rule(BaseModel):
-    class Config:
-        extra = Extra.forbid
-
+@dataclass(frozen=True)
+class Rule:
     name: Optional[str] = None
     goal: Optional[Goal] = None
     goal_wait: Optional[int] = None
     format: Optional[str] = None
-
-
-class RuleConfig(BaseModel):
-    rules: Dict[str, Union[Rule, bool]]
-
-
-def validate_rules(rules: Dict[str, Union[Rule, bool]]):
-    return RuleConfig(rules=rules).rules
-
-
-def get_last_matching_index(matchers: Sequence[str], name: str):
-    index = None
-    for i, (matcher, rule) in list(enumerate(matchers.items())):
-        if re.match(matcher, name):
-            if rule is not True or index is None:
-                index = i
-    if index is None:
-        raise ValueError()
-    return index
-
-
-def get_last_matching_value(matchers, name, field, default):
-    has_match = False
-    for matcher, rule in reversed(list(matchers.items())):
-        if re.match(matcher, name):
-            if rule is False:
-                return matcher, False
-            elif rule is True:
-                has_match = True
-            else:
-                field_value = getattr(rule, field)
-                has_match = True
-                if field_value is not None:
-                    return matcher, field_value
-    if not has_match:
-        return None, False
-    return None, default
+    # Whether the name refers to groups of the matcher, like "\\1_p"
+    name_has_backrefs: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self):
+        # Coerce the options like the field types say, numbers are accepted as
+        # strings (e.g. a "format" of 3)
+        for attr in ("name", "format"):
+            value = getattr(self, attr)
+            if value is not None and not isinstance(value, str):
+                if not isinstance(value, Number):
+                    raise TypeError(
+                        f"{attr} must be a string, got {type(value).__name__}"
+                    )
+                object.__setattr__(self, attr, str(value))
+        if self.goal_wait is not None:
+            # Raises a ValueError if the goal_wait is not an integer
+            object.__setattr__(self, "goal_wait", int(self.goal_wait))
+        if self.goal is not None:
+            # Raises a ValueError if the goal is not a valid Goal
+            object.__setattr__(self, "goal", Goal(self.goal))
+        if self.name is not None and BACKREF_REGEX.search(self.name):
+            object.__setattr__(self, "name_has_backrefs", True)
+
+
+class FieldSpec(NamedTuple):
+    """Display settings of a logged field, resolved once from the rules"""
+
+    formatter: Callable[[Any], str]
+    # 1 if higher is better, -1 if lower is better, 0 if there is no goal
+    goal_sign: int
+    goal_wait: int
+
+
+def validate_rules(
+    rules: Dict[str, Union[Rule, Dict[str, Any], bool]],
+) -> typing.List[Tuple[Pattern, Union[Rule, bool]]]:
+    validated = []
+    for matcher, rule in rules.items():
+        if isinstance(rule, dict):
+            try:
+                rule = Rule(**rule)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid rule for {matcher!r}: {e}") from None
+        elif not isinstance(rule, (Rule, bool)):
+            raise ValueError(
+                f"Invalid rule for {matcher!r}: expected a dict or a bool, "
+                f"got {type(rule).__name__}"
+            )
+        # Compile the regexes once, they are matched against every new logged name
+        validated.append((re.compile(matcher), rule))
+    return validated
+
+
+def get_last_matching_values(
+    matchers: Sequence[Tuple[Pattern, Union[Rule, bool]]], name: str
+) -> Optional[Tuple[Dict[str, Any], int]]:
+    """
+    Resolves the fields (name, format, goal, goal_wait) of a logged name in a single
+    walk over the rules: the last matching rule that sets a field wins.
+
+    Parameters
+    ----------
+    matchers: Sequence[Tuple[Pattern, Union[Rule, bool]]]
+        The validated rules, in declaration order
+    name: str
+        The logged name
+
+    Returns
+    -------
+    Optional[Tuple[Dict[str, Any], int]]
+        None if the name should be hidden, otherwise the value of each field set by
+        the rules (with the groups of the matcher substituted in the name), and the
+        index of the rule used to order the column: the last matching rule that is
+        not `True`, or else the first matching `True` rule
+    """
+    is_hidden = False
+    values = {}
+    rule_idx = None
+    true_rule_idx = None
+    for i in range(len(matchers) - 1, -1, -1):
+        matcher, rule = matchers[i]
+        if not matcher.match(name):
+            continue
+        if rule is False:
+            is_hidden = True
+            break
+        if rule is True:
+            true_rule_idx = i
+            continue
+        if rule_idx is None:
+            rule_idx = i
+        for field_name in ("name", "format", "goal", "goal_wait"):
+            field_value = getattr(rule, field_name)
+            if field_value is not None and field_name not in values:
+                if field_name == "name" and rule.name_has_backrefs and matcher.groups:
+                    field_value = matcher.sub(field_value, name)
+                values[field_name] = field_value
+    if rule_idx is None:
+        rule_idx = true_rule_idx
+    if "name" not in values and (is_hidden or rule_idx is None):
+        return None
+    return values, rule_idx
+
+
+# Shared renderable for tasks without a postfix
+EMPTY_TEXT = Text("")
 
 
 class PostfixColumn(ProgressColumn):
@@ -166,10 +297,18 @@ class PostfixColumn(ProgressColumn):
         table_column: Optional[Column] = None,
     ) -> None:
         super().__init__(table_column=table_column or Column(no_wrap=True))
+        # Last postfix of each task and its Text, to avoid parsing it at each refresh
+        self.postfix_cache: Dict[TaskID, Tuple[str, Text]] = {}
 
     def render(self, task: "Task") -> Text:
-        _text = task.fields.get("postfix", "")
+        _text = task.fields.get("postfix")
+        if not _text:
+            return EMPTY_TEXT
+        cached = self.postfix_cache.get(task.id)
+        if cached is not None and cached[0] == _text:
+            return cached[1]
         text = Text(_text)
+        self.postfix_cache[task.id] = (_text, text)
         return text
 
 
@@ -207,23 +346,32 @@ class RichTablePrinter(Progress):
         self.key: str = key
         self.key_to_row_idx: Dict[str, int] = {}
         self.name_to_column_idx: Dict[str, int] = {}
+        self.column_rule_idx: typing.List[int] = []
+        self.name_to_spec: Dict[str, FieldSpec] = {}
         self.best = {}
+        self._last_refresh_time: float = 0.0
+        self._refresh_timer: Optional[threading.Timer] = None
         self._old_tqdm_new: Any = None
         self.displayed_tasks: typing.List[Dict] = []
+        # Progress of the tqdm bars that has not been sent to their tasks yet
+        self.pending_advances: Dict[TaskID, int] = {}
         if key is not None and key not in fields:
             fields = {key: {}, **fields}
         self.rules = validate_rules(fields)
 
         # Display attributes
         self.logger_table: Optional[Table] = None
+        self.logger_table_renderable: Optional[CachedRenderable] = None
         self.display_handle: Any = None
 
+        self.postfix_column = PostfixColumn()
+
         super().__init__(
             TextColumn("[progress.description]{task.description}"),
             BarColumn(),
             TaskProgressColumn(),
             TimeRemainingColumn(),
-            PostfixColumn(),
+            self.postfix_column,
             auto_refresh=auto_refresh,
             **rich_kwargs,
         )
@@ -231,20 +379,24 @@ class RichTablePrinter(Progress):
 
     def get_renderables(self) -> Iterable[RenderableType]:
         """Get a number of renderables for the progress display."""
-        if self.logger_table is not None:
-            yield self.logger_table
+        if self.logger_table_renderable is not None:
+            yield self.logger_table_renderable
         tasks_table = self.make_tasks_table(self.tasks)
         yield tasks_table
 
     def prune_tasks(self):
-        # Prune displayed & finished tasks
-        remaining_tasks = []
-        for last_task in self.displayed_tasks:
+        # Prune displayed & finished tasks, keeping the others in place
+        displayed_tasks = self.displayed_tasks
+        n_kept = 0
+        for last_task in displayed_tasks:
             if last_task["disposable"]:
                 self.remove_task(last_task["task_id"])
+                self.postfix_column.postfix_cache.pop(last_task["task_id"], None)
+                self.pending_advances.pop(last_task["task_id"], None)
             else:
-                remaining_tasks.append(last_task)
-        self.displayed_tasks = remaining_tasks
+                displayed_tasks[n_kept] = last_task
+                n_kept += 1
+        del displayed_tasks[n_kept:]
 
     def progress_bar(
         self,
@@ -272,10 +424,69 @@ class RichTablePrinter(Progress):
         Iterable
         """
 
+    def flush_advances(self):
+        """
+        Sends the pending progress of the tqdm bars to their tasks
+        """
+        pending_advances = self.pending_advances
+        if pending_advances:
+            for task_id, advance in pending_advances.items():
+                self.update(task_id, advance=advance)
+            pending_advances.clear()
+
+    def refresh(self) -> None:
+        self.flush_advances()
+        super().refresh()
+
+    def add_column(self, name: str) -> int:
+        """
+        Registers a newly logged name and adds its column to the table, unless the
+        rules hide it
+
+        Parameters
+        ----------
+        name: str
+            The logged name
+
+        Returns
+        -------
+        int
+            The index of the column, or -1 if the name is hidden
+        """
+        resolved = get_last_matching_values(self.rules, name)
+        if resolved is None:
+            self.name_to_column_idx[name] = -1
+            return -1
+        values, rule_idx = resolved
+        goal = values.get("goal")
+        goal_sign = 0 if goal is None else -1 if goal == "lower_is_better" else 1
+        self.name_to_spec[name] = FieldSpec(
+            formatter=values.get("format", "{}").format,
+            goal_sign=goal_sign,
+            goal_wait=values.get("goal_wait", 1),
+        )
+
+        # Rules are static, so we can insert the column directly at its
+        # final place: after every column whose rule comes first or is
+        # the same, instead of sorting all the columns again
+        col_idx = bisect.bisect_right(self.column_rule_idx, rule_idx)
+        self.column_rule_idx.insert(col_idx, rule_idx)
+        for other_name, other_idx in self.name_to_column_idx.items():
+            if other_idx >= col_idx:
+                self.name_to_column_idx[other_name] = other_idx + 1
+        column = Column(header=values.get("name", name), no_wrap=True)
+        column._cells = [""] * self.logger_table.row_count
+        self.logger_table.columns.insert(col_idx, column)
+        self.name_to_column_idx[name] = col_idx
+        return col_idx
+
     def log_metrics(self, info: Dict[str, Any]):
         """
         Adds or update a row in the table
 
+        The display is refreshed at most `refresh_per_second` times per second:
+        updates logged in between are drawn at the end of the interval.
+
         Parameters
         ----------
         info: Dict[str, Any]
@@ -283,96 +494,86 @@ class RichTablePrinter(Progress):
         """
         self.ensure_live()
 
-        for name, value in info.items():
-            if name not in self.name_to_column_idx:
-                matcher, column_name = get_last_matching_value(
-                    self.rules, name, "name", default=name
-                )
-                if column_name is False:
-                    self.name_to_column_idx[name] = -1
-                    continue
-                if (
-                    matcher is not None
-                    and re.compile(matcher).groups > 0
-                    and re.findall(r"\\\d+", column_name)
-                ):
-                    column_name = re.sub(matcher, column_name, name)
-                self.logger_table.add_column(column_name, no_wrap=True)
-                self.logger_table.columns[-1]._cells = [""] * (
-                    len(self.logger_table.columns[0]._cells)
-                    if len(self.logger_table.columns)
-                    else 0
-                )
-                self.name_to_column_idx[name] = (
-                    (max(self.name_to_column_idx.values()) + 1)
-                    if len(self.name_to_column_idx)
-                    else 0
-                )
-        new_name_to_column_idx = {}
-        columns = []
-
-        def get_name_index(name):
-            try:
-                return get_last_matching_index(self.rules, name)
-            except ValueError:
-                return len(self.name_to_column_idx)
-
-        for name in sorted(self.name_to_column_idx.keys(), key=get_name_index):
-            if self.name_to_column_idx[name] >= 0:
-                columns.append(self.logger_table.columns[self.name_to_column_idx[name]])
-                new_name_to_column_idx[name] = (
-                    (max(new_name_to_column_idx.values()) + 1)
-                    if len(new_name_to_column_idx)
-                    else 0
-                )
-            else:
-                new_name_to_column_idx[name] = -1
-        self.logger_table.columns = columns
-        self.name_to_column_idx = new_name_to_column_idx
-
+        unchanged_name = None
         if (
             self.key is not None
             and self.key in info
             and info[self.key] in self.key_to_row_idx
         ):
             idx = self.key_to_row_idx[info[self.key]]
+            # The key cell of an existing row already holds this value, unless
+            # its coloring depends on the best value, which must be updated
+            key_spec = self.name_to_spec.get(self.key)
+            if key_spec is None or not key_spec.goal_sign:
+                unchanged_name = self.key
         elif self.key is not None and self.key not in info and self.key_to_row_idx:
-            idx = list(self.key_to_row_idx.values())[-1]
+            # Every row is added with a key, so the last keyed row is the last row
+            idx = self.logger_table.row_count - 1
         else:
-            self.logger_table.add_row()
-            idx = len(self.logger_table.rows) - 1
+            # Table.add_row pads and validates a list of renderables for
+            # every row, here we only need an empty cell in each column
+            for column in self.logger_table.columns:
+                column._cells.append("")
+            self.logger_table.rows.append(Row())
+            idx = self.logger_table.row_count - 1
             if self.key is not None:
                 self.key_to_row_idx[info[self.key]] = idx
+
+        # Local bindings for the per-cell loop
+        columns = self.logger_table.columns
+        name_to_column_idx = self.name_to_column_idx
+        name_to_spec = self.name_to_spec
+        best = self.best
+        # Every column holds one cell per row
+        row_count = self.logger_table.row_count
         for name, value in info.items():
-            if self.name_to_column_idx[name] < 0:
+            if name == unchanged_name:
                 continue
-            prev_count = len(
-                self.logger_table.columns[self.name_to_column_idx[name]]._cells
-            )
-            formatter = get_last_matching_value(self.rules, name, "format", "{}")[1]
+            col_idx = name_to_column_idx.get(name)
+            if col_idx is None:
+                col_idx = self.add_column(name)
+            if col_idx < 0:
+                continue
+            cells = columns[col_idx]._cells
+            spec = name_to_spec[name]
             try:
-                formatted_value = formatter.format(value)
+                formatted_value = spec.formatter(value)
             except ValueError:
                 formatted_value = str(value)
-            goal = get_last_matching_value(self.rules, name, "goal", None)[1]
-            goal_wait = get_last_matching_value(self.rules, name, "goal_wait", 1)[1]
-            if goal is not None:
-                if name not in self.best or prev_count <= goal_wait:
-                    self.best[name] = value
+            if spec.goal_sign:
+                if name not in best or row_count <= spec.goal_wait:
+                    best[name] = value
                 else:
-                    diff = (value - self.best[name]) * (
-                        -1 if goal == "lower_is_better" else 1
-                    )
+                    diff = (value - best[name]) * spec.goal_sign
                     if diff > 0:
-                        self.best[name] = value
-                        formatted_value = "[green]" + formatted_value + "[/green]"
+                        best[name] = value
+                        formatted_value = f"[green]{formatted_value}[/green]"
                     elif diff <= 0:
-                        formatted_value = "[red]" + formatted_value + "[/red]"
-            self.logger_table.columns[self.name_to_column_idx[name]]._cells[
-                idx
-            ] = formatted_value
-
-        self.refresh()
+                        formatted_value = f"[red]{formatted_value}[/red]"
+            cells[idx] = formatted_value
+        # Wait for any refresh running in another thread, so that it does not
+        # cache the table as it was before this update
+        with self.live._lock:
+            self.logger_table_renderable.invalidate()
+
+        now = time.monotonic()
+        remaining = self._last_refresh_time + 1.0 / self.live.refresh_per_second - now
+        if remaining <= 0:
+            self._last_refresh_time = now
+            self.refresh()
+        elif self._refresh_timer is None:
+            # Draw the last logged values at the end of the interval, even if
+            # nothing else is logged or refreshed until then
+            self._refresh_timer = threading.Timer(remaining, self._deferred_refresh)
+            self._refresh_timer.daemon = True
+            self._refresh_timer.start()
+
+    def _deferred_refresh(self):
+        self._refresh_timer = None
+        self._last_refresh_time = time.monotonic()
+        # Runs in the timer thread: leave the pending advances to the thread
+        # that updates the bars
+        super().refresh()
 
     @property
     def log(self):
@@ -385,10 +586,14 @@ class RichTablePrinter(Progress):
     def ensure_live(self):
         if self.logger_table is None:
             self.logger_table = Table()
+            self.logger_table_renderable = CachedRenderable(self.logger_table)
             self.console.clear_live()
             self.start()
 
     def finalize(self):
+        if self._refresh_timer is not None:
+            self._refresh_timer.cancel()
+            self._refresh_timer = None
         if self.logger_table is not None:
             self.refresh()
             self.stop()
@@ -403,6 +608,7 @@ class RichTablePrinter(Progress):
             if self.console.is_interactive and self.console.is_terminal:
                 self.console.print()
             self.logger_table = None
+            self.logger_table_renderable = None
 
     def hijack_tqdm(self):
         """
@@ -423,30 +629,13 @@ class RichTablePrinter(Progress):
             desc=None,
             total=None,
             leave=False,
-            file=None,
-            ncols=None,
+            *args,
             mininterval=0.1,
-            maxinterval=10.0,
-            miniters=None,
-            ascii=None,
             disable=False,
-            unit="it",
-            unit_scale=False,
-            dynamic_ncols=False,
-            smoothing=0.3,
-            bar_format=None,
-            initial=0,
-            position=None,
-            postfix=None,
-            unit_divisor=1000,
-            write_bytes=None,
-            lock_args=None,
-            nrows=None,
-            colour=None,
-            delay=0,
-            gui=False,
             **kwargs,
         ):
+            # Only the options used by the shim are named, the other tqdm
+            # arguments are accepted and ignored
             return TqdmShim(
                 iterable=iterable,
                 description=desc,
@@ -517,20 +706,32 @@ class TqdmShim:
                     yield item
                     self.update(1)
             finally:
+                self.flush()
                 if not self.leave:
                     self.task["disposable"] = True
 
     def reset(self, total=0):
         if self.task_id is None:
             return
+        self.printer.pending_advances.pop(self.task_id, None)
         self.printer.reset(self.task_id, total=total)
 
     def update(self, n=1):
         if self.task_id is None:
             return
-        self.printer.update(self.task_id, advance=n)
+        # Updating the rich task is costly: accumulate the progress and only
+        # forward it to the task when the printer is refreshed
+        pending_advances = self.printer.pending_advances
+        pending_advances[self.task_id] = pending_advances.get(self.task_id, 0) + n
         self.refresh()
 
+    def flush(self):
+        if self.task_id is None:
+            return
+        advance = self.printer.pending_advances.pop(self.task_id, 0)
+        if advance:
+            self.printer.update(self.task_id, advance=advance)
+
     def set_description(self, desc, refresh=True):
         if self.task_id is None:
             return
@@ -545,6 +746,7 @@ class TqdmShim:
         self.last_tick = tick
         if self.task_id is None:
             return
+        self.flush()
         self.printer.refresh()
 
     @staticmethod
@@ -563,7 +765,7 @@ class TqdmShim:
         out  : str
             Formatted number.
         """
-        f = "{0:.3g}".format(n).replace("+0", "+").replace("-0", "-")
+        f = f"{n:.3g}".replace("+0", "+").replace("-0", "-")
         n = str(n)
         return f if len(f) < len(n) else n
 
@@ -583,29 +785,27 @@ class TqdmShim:
         if self.task_id is None:
             return
 
-        postfix = OrderedDict([] if ordered_dict is None else ordered_dict)
+        # Plain dicts preserve the insertion order
+        postfix = dict(ordered_dict or ())
         for key in sorted(kwargs.keys()):
             postfix[key] = kwargs[key]
         # Preprocess stats according to datatype
-        for key in postfix.keys():
-            # Number: limit the length of the string
-            if isinstance(postfix[key], Number):
-                postfix[key] = self.format_num(postfix[key])
+        parts = []
+        for key, value in postfix.items():
+            # Number: limit the length of the string (no whitespace to strip)
+            if isinstance(value, Number):
+                value = self.format_num(value)
             # Else for any other type, try to get the string conversion
-            elif not isinstance(postfix[key], str):
-                postfix[key] = str(postfix[key])
-            # Else if it's a string, don't need to preprocess anything
+            else:
+                value = str(value).strip()
+            parts.append(f"{key}={value}")
         # Stitch together to get the final postfix
-        self.printer.update(
-            self.task_id,
-            postfix=", ".join(
-                key + "=" + postfix[key].strip() for key in postfix.keys()
-            ),
-        )
+        self.printer.update(self.task_id, postfix=", ".join(parts))
         if refresh:
             self.refresh()
 
     def close(self):
+        self.flush()
         self.refresh()
         if self.task is not None:
             self.task["disposable"] = True
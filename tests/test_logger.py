@@ -1,5 +1,9 @@
 import time
+from io import StringIO
 
+import pytest
+import tqdm
+from rich.console import Console
 from tqdm import trange
 
 from rich_logger import RichTablePrinter
@@ -162,3 +166,82 @@ def test_tqdm(capsys):
         " ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ 100% 0:00:00  \n"
         " ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━ 100% 0:00:00  \n"
     )
+
+
+def test_invalid_rules():
+    with pytest.raises(ValueError):
+        RichTablePrinter(fields={"step": {"unknown_option": True}})
+    with pytest.raises(ValueError, match="'loss'"):
+        RichTablePrinter(fields={"loss": {"goal": "lowest"}})
+    with pytest.raises(ValueError, match="'loss'"):
+        RichTablePrinter(fields={"loss": {"goal_wait": "abc"}})
+    with pytest.raises(ValueError, match="'loss'"):
+        RichTablePrinter(fields={"loss": {"format": ["{}"]}})
+
+
+def test_rule_coercion(capsys):
+    fields = {"step": {}, "loss": {"goal": "lower_is_better", "goal_wait": "2"}}
+    with RichTablePrinter(key="step", fields=fields) as printer:
+        printer.log({"step": 1, "loss": 1.0})
+        printer.log({"step": 2, "loss": 0.5})
+        printer.log({"step": 3, "loss": 0.25})
+    assert "0.25" in capsys.readouterr().out
+
+    printer = RichTablePrinter(fields={"step": {"format": 3, "name": 1}})
+    rule = printer.rules[0][1]
+    assert rule.format == "3" and rule.name == "1"
+
+
+def test_manual_tqdm_updates(capsys):
+    with RichTablePrinter(key="step", fields={".*": True}) as printer:
+        printer.log({"step": 1})
+        # Updated faster than the refresh interval and never closed
+        bar = tqdm.tqdm(total=50, leave=True)
+        for _ in range(50):
+            bar.update(1)
+    captured = capsys.readouterr()
+    assert "100%" in captured.out
+
+
+def test_key_with_goal():
+    printer = RichTablePrinter(key="step", fields={".*": {"goal": "higher_is_better"}})
+    for step in (1, 2):
+        printer.log({"step": step, "loss": 1.0})
+        printer.log({"step": step, "acc": 0.5})
+    # The key is compared again when its row is updated: 2 is no longer a new best
+    assert printer.logger_table.columns[0]._cells == ["1", "[red]2[/red]"]
+    printer.finalize()
+
+
+def test_throttled_log_is_drawn():
+    file = StringIO()
+    console = Console(force_terminal=True, file=file, width=80)
+    printer = RichTablePrinter(key="step", fields={".*": True}, console=console)
+    printer.log({"step": 1, "loss": 1.0})
+    # Logged right after the previous refresh, so it must be drawn later
+    printer.log({"step": 1, "val": 0.5})
+    time.sleep(0.5)
+    assert "0.5" in file.getvalue()
+    printer.finalize()
+
+
+def test_live_refresh():
+    file = StringIO()
+    console = Console(force_terminal=True, file=file, width=80)
+    with RichTablePrinter(key="step", fields={".*": True}, console=console) as printer:
+        printer.log({"step": 1, "score": 1.5})
+        time.sleep(0.2)
+        # The cached table must be rendered again after a new log
+        printer.log({"step": 1, "score": 2.75})
+        time.sleep(0.2)
+        assert "2.75" in file.getvalue()
+
+        bar = tqdm.tqdm(total=10)
+        bar.set_postfix(loss=0.125)
+        time.sleep(0.2)
+        bar.update(1)
+        assert "loss=0.125" in file.getvalue()
+        bar.set_postfix(loss=0.5)
+        time.sleep(0.2)
+        bar.update(1)
+        assert "loss=0.5" in file.getvalue()